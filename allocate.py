@@ -68,55 +68,72 @@ def allocate(preferences, officers_per_org, min_shifts, max_shifts):
         for j in i:
             sum_of_allocation += j
 
-    # Only consider generating flow network graph if the number
-    if number_of_officers * min_shifts - sum_of_allocation * days <= 0:
+    # Only consider generating flow network graph if the number of shifts needed over the month lies between the
+    # minimum and maximum number of shifts the officers can take, and a day does not need more officers than there
+    # are, since every officer takes at most one shift per day. Every day needs the same sum_of_allocation officers,
+    # so a single comparison covers all of the days.
+    if (number_of_officers * min_shifts - sum_of_allocation * days <= 0
+            and sum_of_allocation * days <= number_of_officers * max_shifts
+            and sum_of_allocation <= number_of_officers):
 
         # Create flow network graph
         flow_graph = FlowNetwork(
             1 + 1 + number_of_officers + days * number_of_officers + 3 * days * number_of_companies + 1)
 
+        # First company shift vertex of the day vertices and of every single day
+        company_day_index = (days + 1) * number_of_officers + 2
+        day_bases = [company_day_index + 3 * d * number_of_companies for d in range(days)]
+
+        # Edges of the flow network as parallel lists of start vertices, end vertices and capacities
+        starts, ends, capacities = [], [], []
+
         # Connect Source to Original Source
-        flow_graph.add_edge(0, 1, sum_of_allocation * days - number_of_officers * min_shifts)
+        starts.append(0)
+        ends.append(1)
+        capacities.append(sum_of_allocation * days - number_of_officers * min_shifts)
 
         # Connect Source to Security Officers
-        for i in range(2, number_of_officers + 2):
-            flow_graph.add_edge(0, i, min_shifts)
-            flow_graph.add_edge(1, i, max_shifts - min_shifts)
+        officer_vertices = range(2, number_of_officers + 2)
+        starts += [0] * number_of_officers + [1] * number_of_officers
+        ends += [*officer_vertices, *officer_vertices]
+        capacities += [min_shifts] * number_of_officers + [max_shifts - min_shifts] * number_of_officers
 
         # Connect Officers to Days
-        for i in range(2, number_of_officers + 2):
-            for j in range(1, days + 1):
-                flow_graph.add_edge(i, i + j * number_of_officers, 1)
-
-        # Connect Days to Company Shift Days
+        for i in officer_vertices:
+            starts += [i] * days
+            ends += range(i + number_of_officers, i + (days + 1) * number_of_officers, number_of_officers)
+        capacities += [1] * (number_of_officers * days)
+
+        # Connect Days to Company Shift Days, every day vertex connects to the company shifts of its day that the officer
+        # is willing to take. Shifts the officer does not prefer would have capacity 0, so they are left out.
+        # The offsets and capacities of these edges only depend on the preference, and there are at most 8 distinct
+        # preferences, so each one is converted and laid out once.
+        shift_layouts = {}
         for i in range(number_of_officers):
-            s0, s1, s2 = map(int, preferences[i])
-            temp = 0
-            for j in range(number_of_officers + 2 + i, (days + 1) * number_of_officers + 2, number_of_officers):
-                day_index = (days + 1) * number_of_officers + 2 + 3 * temp * number_of_companies
-                shift = 0
-                for k in range(day_index, day_index + 3 * number_of_companies):
-                    if shift == 0:
-                        flow_graph.add_edge(j, k, s0)
-
-                    if shift == 1:
-                        flow_graph.add_edge(j, k, s1)
+            key = tuple(preferences[i])
+            if key not in shift_layouts:
+                preference = list(map(int, key))
+                shift_offsets = [3 * j + k for j in range(number_of_companies) for k in range(3) if preference[k]]
+                shift_layouts[key] = shift_offsets, [preference[offset % 3] for offset in shift_offsets]
+            shift_offsets, shift_capacities = shift_layouts[key]
 
-                    if shift == 2:
-                        flow_graph.add_edge(j, k, s2)
+            edge_count = len(shift_offsets)
 
-                    shift = (shift + 1) % 3
-
-                temp += 1
+            for day_vertex, day_index in zip(range(number_of_officers + 2 + i, company_day_index, number_of_officers),
+                                             day_bases):
+                starts += [day_vertex] * edge_count
+                ends += [day_index + offset for offset in shift_offsets]
+                capacities += shift_capacities
 
         # Connect Company Shift Days to Sink
         for i in range(number_of_companies):
-            company_day_index = (days + 1) * number_of_officers + 2
+            for day_index in day_bases:
+                j = day_index + 3 * i
+                starts += [j, j + 1, j + 2]
+                ends += [-1, -1, -1]
+                capacities += officers_per_org[i][:3]
 
-            for j in range(company_day_index + 3 * i, company_day_index + 3 * days * number_of_companies + 3 * i,
-                           3 * number_of_companies):
-                for k in range(3):
-                    flow_graph.add_edge(j + k, -1, officers_per_org[i][k])
+        flow_graph.add_edges_bulk(starts, ends, capacities)
 
         # Set the sink and source vertices
         flow_graph.define_sink_source(0, -1)
@@ -126,28 +143,26 @@ def allocate(preferences, officers_per_org, min_shifts, max_shifts):
 
         # Flow network is valid if the flow of the graph is equal to the sum of allocations for day * 30 days
         if flow == days * sum_of_allocation:
-            ans = [[[[0 for _ in range(3)] for _ in range(days)] for _ in range(number_of_companies)] for _ in
+            # Innermost shift lists are built with a single repetition each, every cell shares the cached int 0
+            ans = [[[[0] * 3 for _ in range(days)] for _ in range(number_of_companies)] for _ in
                    range(number_of_officers)]
 
+            # Company and shift of every company shift vertex, relative to the first company shift vertex of its day
+            shift_slots = [(j, k) for j in range(number_of_companies) for k in range(3)]
+
             # Fill in allocation based on flow graph
             for i in range(number_of_officers):  # For every officer
-                for officer_day_edge in flow_graph.graph[i + 2].edges:  # Iterate through every edge
+                # Officer vertices only have their day edges, which were added in day order
+                for d, officer_day_edge in enumerate(flow_graph.graph[i + 2].edges):
                     if officer_day_edge.flow == 1:  # IF edge has flow of 1
-                        # calculate day
-                        d = (
-                                        officer_day_edge.end_vertex.vertex_id - officer_day_edge.start_vertex.vertex_id) // number_of_officers - 1
+                        day_index = day_bases[d]
                         for day_company_edge in officer_day_edge.end_vertex.edges:  # Iterate through every company edge
                             if day_company_edge.flow == 1:  # If company edge has flow of 1
-                                offset = 1 + 1 + number_of_officers + days * number_of_officers  # Calculate offset
-
-                                # Calculate k
-                                k = (day_company_edge.end_vertex.vertex_id - 3 * d * number_of_companies - offset) % 3
-
-                                # Calculate j
-                                j = (day_company_edge.end_vertex.vertex_id - 3 * d * number_of_companies - offset) // 3
+                                j, k = shift_slots[day_company_edge.end_vertex.vertex_id - day_index]
 
-                                # Set allocation
+                                # Set allocation, a day vertex only receives one unit of flow so the search can stop
                                 ans[i][j][d][k] = 1
+                                break
             return ans
         else:
             return None
\ No newline at end of file
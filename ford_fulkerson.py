@@ -1,7 +1,12 @@
+from collections import deque
+
+
 class FlowVertex:
+    __slots__ = ('vertex_id', 'sink', 'source', 'edges', 'index')
+
     def __init__(self, vertex_id, index):
         """
-        Constructor method for Vertex class, used for both Flow and Residual Networks
+        Constructor method for Vertex class, used for Flow Network
         Written by Brandon Wee Yong Jing
 
         Input:
@@ -24,6 +29,8 @@ class FlowVertex:
 
 
 class FlowEdge:
+    __slots__ = ('start_vertex', 'end_vertex', 'capacity', 'flow')
+
     def __init__(self, start_vertex, end_vertex, capacity):
         """
         Constructor method for FlowEdge class, used for Flow Network
@@ -43,8 +50,6 @@ class FlowEdge:
         self.end_vertex = end_vertex
         self.capacity = capacity
         self.flow = 0
-        self.forward_residual_edge = None
-        self.backward_residual_edge = None
     #
     # def __repr__(self):
     #     return f"{self.start_vertex.vertex_id} -- {self.capacity} -> {self.end_vertex.vertex_id}"
@@ -87,6 +92,26 @@ class FlowNetwork:
         new_edge = FlowEdge(self.graph[start], self.graph[end], capacity)
         self.graph[start].edges.append(new_edge)
 
+    def add_edges_bulk(self, starts, ends, capacities):
+        """
+        Method used to add many edges at once, where the i-th edge goes from starts[i] to ends[i] with capacity
+        capacities[i]
+
+        Input:
+            starts: List of integers representing the index of the start vertex of every edge
+            ends: List of integers representing the index of the end vertex of every edge
+            capacities: List of integers representing the capacity of every edge
+        Return:
+            None
+
+        Let e be the number of edges added.
+        time complexity: Best case and worst case is O(e).
+        space complexity: Input: O(e), Auxiliary: O(e).
+        """
+        graph = self.graph
+        for start, end, capacity in zip(starts, ends, capacities):
+            graph[start].edges.append(FlowEdge(graph[start], graph[end], capacity))
+
     def define_sink_source(self, source_index, sink_index):
         """
         Method used to set the sink and source vertices in the flow network
@@ -108,41 +133,14 @@ class FlowNetwork:
         self.source = source_index
 
 
-class ResidualEdge:
-    def __init__(self, flow_edge, flow, forwards=True):
-        """
-        Constructor method for Flow Network class.
-        Written by Brandon Wee Yong Jing
-
-        Input:
-            flow_edge: FlowEdge representing the edge that will be converted to the residual edge for the residual network
-            flow: Integer representing the flow of the residual edge
-            forwards: Optional boolean with default value True to represent whether the edge is a forwards or backwards edge
-        Return:
-            None
-
-        time complexity: Best case and worst case is O(1).
-        space complexity: Input: O(1), Auxiliary: O(1).
-        """
-        self.flow_edge = flow_edge
-        self.flow = flow
-        self.forwards = forwards
-
-        if forwards:
-            self.start_vertex = flow_edge.start_vertex
-            self.end_vertex = flow_edge.end_vertex
-        else:
-            self.start_vertex = flow_edge.end_vertex
-            self.end_vertex = flow_edge.start_vertex
-
-    # def __repr__(self):
-    #     return f"{self.start_vertex.vertex_id} -- {self.flow} -> {self.end_vertex.vertex_id}"
-
-
 class ResidualNetwork:
     def __init__(self, flow_network: FlowNetwork):
         """
-        Constructor method for Residual Network class.
+        Constructor method for Residual Network class. The residual network is stored as parallel integer lists indexed
+        by edge id, where every vertex links its outgoing edges through head and next_edge. Each flow edge adds a forward
+        residual edge at an even id e and a backward residual edge at id e ^ 1, so the pair of any residual edge is
+        found with a single XOR. Parallel flow edges are not merged. Each one gets its own pair of residual edges, so no
+        scan over the existing edges of a vertex is needed.
         Written by Brandon Wee Yong Jing
 
         Input:
@@ -154,165 +152,330 @@ class ResidualNetwork:
         time complexity: Best case and worst case is O(v + e).
         space complexity: Input: O(1), Auxiliary: O(v + e).
         """
-        # Define residual network
-        self.graph = [FlowVertex(i, i) for i in range(flow_network.n)]
+        n = flow_network.n
+        self.n = n
 
         # Set source and sink of residual network
-        self.source = flow_network.source
-        self.sink = flow_network.sink
-        self.graph[self.source].source = True
-        self.graph[self.sink].sink = True
+        self.source = flow_network.source % n
+        self.sink = flow_network.sink % n
         self.residual_capacity = float('inf')
 
-        # Add all edges to residual network
-        for flow_vertex in flow_network.graph:
-            for flow_edge in flow_vertex.edges:
-                forward_edge = ResidualEdge(flow_edge, flow_edge.capacity)
-                backward_edge = ResidualEdge(flow_edge, 0, False)
+        # First outgoing edge of every vertex, -1 if the vertex has none
+        self.head = [-1] * n
 
-                start = flow_edge.start_vertex
-                end = flow_edge.end_vertex
+        # Edge arrays: next outgoing edge of the same start vertex, end vertex and residual capacity. The start vertex of
+        # edge e is the end vertex of its pair, to[e ^ 1], so it is not stored.
+        self.next_edge = []
+        self.to = []
+        self.flow = []
 
-                for residual_edge in self.graph[start.vertex_id].edges:
-                    # Update residual edge flow if edge already exist instead of creating a new edge
-                    if residual_edge.start_vertex.vertex_id == start.vertex_id and residual_edge.end_vertex.vertex_id == end.vertex_id:
-                        residual_edge.flow += forward_edge.flow
-                        forward_edge = residual_edge
-                        break
-                else:
-                    # Create new forward residual edge
-                    self.graph[start.vertex_id].edges.append(forward_edge)
-
-                for residual_edge in self.graph[end.vertex_id].edges:
-                    # Update residual edge flow if edge already exist instead of creating a new edge
-                    if residual_edge.start_vertex.vertex_id == end.vertex_id and residual_edge.end_vertex.vertex_id == start.vertex_id:
-                        residual_edge.flow += backward_edge.flow
-                        backward_edge = residual_edge
-                        break
-                else:
-                    # Create new backward residual edge
-                    self.graph[end.vertex_id].edges.append(backward_edge)
+        # Flow edge of every pair of residual edges, the pair at ids e and e ^ 1 belongs to flow_edges[e >> 1]
+        self.flow_edges = []
 
-                flow_edge.forward_residual_edge = forward_edge
-                flow_edge.backward_residual_edge = backward_edge
+        # BFS queue, every vertex is enqueued at most once per search so it never needs to wrap around
+        self.queue = [0] * n
+
+        # Level graph and current-arc pointers, reused across every phase of Dinic's algorithm
+        self.level = [-1] * n
+        self.iter_ptr = [-1] * n
+
+        # Add all edges to residual network, edges without capacity can never carry flow so they are skipped
+        for flow_vertex in flow_network.graph:
+            for flow_edge in flow_vertex.edges:
+                if flow_edge.capacity <= 0:
+                    continue
+                self.flow_edges.append(flow_edge)
+                self.add_edge(flow_edge.start_vertex.index, flow_edge.end_vertex.index, flow_edge.capacity)
 
-    def get_hasAugmentingPath(self):
+    def add_edge(self, start, end, capacity):
         """
-        Get an augmenting path in residual network using BFS.
-        Written by Brandon Wee Yong Jing
+        Method used to add a forward residual edge and its backward residual edge between start and end vertices
 
         Input:
-            None
+            start: Integer representing the index of the start vertex in the edge
+            end: Integer representing the index of the end vertex in the edge
+            capacity: Integer representing the capacity of the edge
         Return:
-            path: A list representing the augmenting path
+            e: Integer representing the id of the forward residual edge
 
-        Let v be the number of vertices and e be the number of edges in the flow_network.
-        time complexity: Best case and worst case is O(v + e).
-        space complexity: Input: O(1), Auxiliary: O(v + e).
+        time complexity: Best case and worst case is O(1).
+        space complexity: Input: O(1), Auxiliary: O(1).
         """
-        visited = [False] * len(self.graph)
-        previous = [None] * len(self.graph)
-        queue = deque([self.graph[self.source]])
-
-        # BFS to traverse residual network in order to obtain augmenting path
-        while queue:
-            current = queue.popleft()
-            if visited[current.index]:
-                continue
+        e = len(self.to)
 
-            visited[current.index] = True
-            # If augmenting path is found
-            if current.sink:
-                # Backtrack to obtain the augmenting path
-                return self.backtrack(previous, current.index)
+        # Forward residual edge starts with the full capacity available
+        self.next_edge.append(self.head[start])
+        self.to.append(end)
+        self.flow.append(capacity)
+        self.head[start] = e
 
-            for neighbours in current.edges:
-                if not visited[neighbours.end_vertex.index]:
-                    if neighbours.flow != 0:
-                        previous[neighbours.end_vertex.index] = neighbours
-                        queue.append(self.graph[neighbours.end_vertex.index])
+        # Backward residual edge starts with no capacity available
+        self.next_edge.append(self.head[end])
+        self.to.append(start)
+        self.flow.append(0)
+        self.head[end] = e + 1
 
-        # No augmenting path found, so return empty list
-        return []
+        return e
 
-    def backtrack(self, previous, end_idx):
+    def augmentFlow(self, path):
         """
-        Backtrack method used to obtain the augmenting path from the end vertex. It also sets the residual capacity as an
-        instance variable.
+        Method to augment the flow in the residual network
         Written by Brandon Wee Yong Jing
 
         Input:
-            previous: list of visited vertices
-            end_idx: integer representing the end vertex
+            path: list of edge ids that forms the augmenting path
         Return:
-            path: list of edges that forms the augmenting path
+            None
 
         Let v be the number of vertices.
         time complexity: Best case and worst case is O(v).
         space complexity: Input: O(v), Auxiliary: O(v).
         """
-        path = []
-        residual_capacity = float('inf')
+        flow = self.flow
+        residual_capacity = self.residual_capacity
 
-        # Backtrack to obtain the path
-        while previous[end_idx] is not None:
-            path.append(previous[end_idx])
-            end_idx = previous[end_idx].start_vertex.index
+        # Augment every edge in residual network
+        for e in path:
+            flow[e] -= residual_capacity
+            flow[e ^ 1] += residual_capacity
 
-            # Find the residual capacity
-            residual_capacity = min(residual_capacity, abs(path[-1].flow))
+    def build_levels(self):
+        """
+        Build the level graph of the residual network using BFS from the source. The level of a vertex is its distance
+        from the source using only edges with remaining capacity, and is stored in the level instance variable.
 
-        # Set residual capacity
-        self.residual_capacity = residual_capacity
-        return path[::-1]
+        Input:
+            None
+        Return:
+            found: Boolean representing whether the sink is reachable from the source
 
-    def augmentFlow(self, path):
+        Let v be the number of vertices and e be the number of edges in the flow_network.
+        time complexity: Best case and worst case is O(v + e).
+        space complexity: Input: O(1), Auxiliary: O(v).
         """
-        Method to augment the flow in the residual network
-        Written by Brandon Wee Yong Jing
+        head, next_edge, to, flow = self.head, self.next_edge, self.to, self.flow
+        level, iter_ptr = self.level, self.iter_ptr
+        for i in range(self.n):
+            level[i] = -1
+            iter_ptr[i] = head[i]
+
+        level[self.source] = 0
+        queue = self.queue
+        queue[0] = self.source
+        front, back = 0, 1
+
+        # BFS over the edges that still have residual capacity
+        while front < back:
+            current = queue[front]
+            front += 1
+            next_level = level[current] + 1
+            e = head[current]
+            while e != -1:
+                v = to[e]
+                if level[v] < 0 and flow[e] > 0:
+                    level[v] = next_level
+                    queue[back] = v
+                    back += 1
+                e = next_edge[e]
+
+        return level[self.sink] >= 0
+
+    def push_blocking_flow(self):
+        """
+        Push a blocking flow through the level graph built by build_levels, using an iterative DFS. Every vertex keeps a
+        current-arc pointer into its edges so that each edge is examined at most once per phase. After every
+        augmentation the DFS only retreats to the first saturated edge of the path, so many augmenting paths are found
+        per BFS.
 
         Input:
-            path: list of edges that forms the augmenting path
-        Return:
             None
+        Return:
+            flow: Integer representing the total flow pushed in this phase
 
-        Let v be the number of vertices.
-        time complexity: Best case and worst case is O(v).
-        space complexity: Input: O(v), Auxiliary: O(v).
+        Let v be the number of vertices and e be the number of edges in the flow_network.
+        time complexity: Best case and worst case is O(ve).
+        space complexity: Input: O(1), Auxiliary: O(v).
         """
+        next_edge, to, residual = self.next_edge, self.to, self.flow
+        level, iter_ptr = self.level, self.iter_ptr
+        source, sink = self.source, self.sink
+        flow = 0
+        path = []
+        current = source
+
+        while True:
+            # Advance along admissible edges until the sink is reached
+            while current != sink:
+                next_level = level[current] + 1
+                e = iter_ptr[current]
+                while e != -1:
+                    if residual[e] > 0 and level[to[e]] == next_level:
+                        break
+                    e = next_edge[e]
+                iter_ptr[current] = e
+
+                if e == -1:
+                    # Dead end, so the phase is over if we are back at the source
+                    if not path:
+                        return flow
+
+                    # Otherwise retreat and skip the edge that led here
+                    e = path.pop()
+                    current = to[e ^ 1]
+                    iter_ptr[current] = next_edge[e]
+                    continue
+
+                path.append(e)
+                current = to[e]
+
+            # Augment along the path found with its bottleneck capacity
+            self.residual_capacity = min(residual[e] for e in path)
+            self.augmentFlow(path)
+            flow += self.residual_capacity
+
+            # Keep the part of the path before the first saturated edge and continue the DFS from its start vertex
+            for i, e in enumerate(path):
+                if residual[e] == 0:
+                    current = to[e ^ 1]
+                    del path[i:]
+                    break
+
+    def update_flow_network(self):
+        """
+        Method to copy the flow of every flow edge back onto the flow network. The residual capacity of a backward
+        residual edge is exactly the flow sent along its flow edge.
 
-        # Augment every edge in residual network
-        for residual_edge in path:
-            flow_edge = residual_edge.flow_edge
-            flow_edge.flow += self.residual_capacity
-
-            forward_edge = flow_edge.forward_residual_edge
-            backward_edge = flow_edge.backward_residual_edge
+        Input:
+            None
+        Return:
+            None
 
-            forward_edge.flow -= self.residual_capacity
-            backward_edge.flow += self.residual_capacity
+        Let e be the number of edges in the flow_network.
+        time complexity: Best case and worst case is O(e).
+        space complexity: Input: O(1), Auxiliary: O(1).
+        """
+        flow = self.flow
+        for i, flow_edge in enumerate(self.flow_edges):
+            flow_edge.flow = flow[2 * i + 1]
 
 
 def FordFulkerson(graph):
     """
-    Standard implementation of ford fulkerson
+    Implementation of ford fulkerson that finds augmenting paths with Dinic's algorithm, pushing a blocking flow
+    through the level graph in every phase instead of augmenting one BFS path at a time.
     Written by Brandon Wee Yong Jing
 
     Input:
-        path: list of edges that forms the augmenting path
+        graph: FlowNetwork with its source and sink defined
     Return:
-        None
+        flow: Integer representing the maximum flow of the network
 
     Let v be the number of vertices and e be the number of edges in the flow network.
-    time complexity: Best case and worst case is O(ve^2).
+    time complexity: Best case and worst case is O(v^2 e).
     space complexity: Input: O(v + e), Auxiliary: O(v + e).
     """
     flow = 0
     residual_network = ResidualNetwork(graph)
 
-    # Continues to augment path until an augmenting path cannot be formed
-    while path := residual_network.get_hasAugmentingPath():
-        flow += residual_network.residual_capacity
-        residual_network.augmentFlow(path)
+    # Continues to push blocking flows until the sink is no longer reachable
+    while residual_network.build_levels():
+        flow += residual_network.push_blocking_flow()
+
+    # Record the flow of every edge in the flow network
+    residual_network.update_flow_network()
+
+    return flow
+
+
+def PushRelabel(graph):
+    """
+    FIFO push-relabel implementation of maximum flow, which can be used in place of FordFulkerson. Every edge leaving
+    the source is saturated at the start, then active vertices are discharged in FIFO order by pushing their excess
+    along admissible edges and relabelling them when none are left, without ever searching for an augmenting path.
+
+    Input:
+        graph: FlowNetwork with its source and sink defined
+    Return:
+        flow: Integer representing the maximum flow of the network
+
+    Let v be the number of vertices and e be the number of edges in the flow network.
+    time complexity: Best case and worst case is O(v^3).
+    space complexity: Input: O(v + e), Auxiliary: O(v + e).
+    """
+    residual_network = ResidualNetwork(graph)
+    n = residual_network.n
+    head, next_edge = residual_network.head, residual_network.next_edge
+    to, residual = residual_network.to, residual_network.flow
+    source, sink = residual_network.source, residual_network.sink
+
+    height = [n] * n
+    excess = [0] * n
+    current_arc = head[:]
+
+    # Label every vertex with its distance to the sink, using BFS backwards over edges with residual capacity.
+    # Vertices that cannot reach the sink keep the height of the source.
+    height[sink] = 0
+    queue = residual_network.queue
+    queue[0] = sink
+    front, back = 0, 1
+    while front < back:
+        current = queue[front]
+        front += 1
+        e = head[current]
+        while e != -1:
+            v = to[e]
+            if height[v] == n and v != source and residual[e ^ 1] > 0:
+                height[v] = height[current] + 1
+                queue[back] = v
+                back += 1
+            e = next_edge[e]
+
+    # Saturate every edge leaving the source to form the initial preflow. A self-loop on the source cannot carry flow,
+    # and saturating it would leave excess on the source and queue it as an active vertex.
+    active = deque()
+    e = head[source]
+    while e != -1:
+        v = to[e]
+        if residual[e] > 0 and v != source:
+            if excess[v] == 0 and v != sink:
+                active.append(v)
+            excess[v] += residual[e]
+            residual[e ^ 1] += residual[e]
+            residual[e] = 0
+        e = next_edge[e]
+
+    # Discharge active vertices until no vertex other than the source and sink holds excess
+    while active:
+        current = active.popleft()
+        while excess[current] > 0:
+            e = current_arc[current]
+
+            if e == -1:
+                # No admissible edge left, so relabel to just above the lowest neighbour with residual capacity
+                min_height = 2 * n
+                e = head[current]
+                while e != -1:
+                    if residual[e] > 0 and height[to[e]] < min_height:
+                        min_height = height[to[e]]
+                    e = next_edge[e]
+                height[current] = min_height + 1
+                current_arc[current] = head[current]
+                continue
 
-    return flow
\ No newline at end of file
+            v = to[e]
+            if residual[e] > 0 and height[current] == height[v] + 1:
+                # Push as much excess as the edge allows
+                delta = min(excess[current], residual[e])
+                residual[e] -= delta
+                residual[e ^ 1] += delta
+                excess[current] -= delta
+                if excess[v] == 0 and v != source and v != sink:
+                    active.append(v)
+                excess[v] += delta
+            else:
+                current_arc[current] = next_edge[e]
+
+    # Record the flow of every edge in the flow network
+    residual_network.update_flow_network()
+
+    return excess[sink]
\ No newline at end of file